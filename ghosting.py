@@ -2,44 +2,347 @@ import av
 from av.video.frame import PictureType
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
+import numpy as np
 import pandas as pd
+import functools
+import json
 import os
+import queue
+import struct
 import subprocess
+import tempfile
+import threading
+from fractions import Fraction
 
+try:
+    import numba
+except ImportError:
+    # Optional: create_numpy_ghost_video falls back to plain NumPy reductions
+    numba = None
 
-def analyze_video(file_path):
+
+# Frame types are stored as uint8 codes indexing this table
+FRAME_TYPES = np.array(["I", "P", "B", "Unknown"])
+I_FRAME, P_FRAME, B_FRAME, UNKNOWN_FRAME = range(len(FRAME_TYPES))
+_FRAME_TYPE_CODES = {name: code for code, name in enumerate(FRAME_TYPES)}
+
+# Timebase of MPEG-TS streams, assumed for reports written without a sidecar
+DEFAULT_TIME_BASE = Fraction(1, 90000)
+
+# slice_type % 5 -> frame type (SP/SI slices are reported as P/I)
+_SLICE_TYPES = (P_FRAME, B_FRAME, I_FRAME, P_FRAME, I_FRAME)
+
+
+def _read_ue(data, bit):
+    """
+    Reads one unsigned Exp-Golomb code starting at bit offset `bit`.
+    Returns (value, next_bit).
+    """
+    zeros = 0
+    while not (data[bit >> 3] >> (7 - (bit & 7))) & 1:
+        zeros += 1
+        bit += 1
+    bit += 1
+    value = 0
+    for _ in range(zeros):
+        value = (value << 1) | ((data[bit >> 3] >> (7 - (bit & 7))) & 1)
+        bit += 1
+    return (1 << zeros) - 1 + value, bit
+
+
+def _h264_frame_type(data, length_size=4):
     """
-    Uses PyAV to probe the video container and extract the type (I, P, B) 
+    Reads the I/P/B type code of an H.264 access unit straight from its NAL headers,
+    without reconstructing any pixels. `length_size` is the NAL length prefix
+    size of MP4 (avcC) packets; pass 0 for Annex B start-code streams (MPEG-TS).
+    """
+    pos = 0
+    while pos < len(data):
+        if not length_size:
+            start = data.find(b"\x00\x00\x01", pos)
+            if start == -1:
+                break
+            start += 3
+            end = data.find(b"\x00\x00\x01", start)
+            end = len(data) if end == -1 else end
+        else:
+            start = pos + length_size
+            end = start + int.from_bytes(data[pos:start], "big")
+        pos = end
+        if start >= min(end, len(data)):
+            continue
+
+        nal_type = data[start] & 0x1F
+        if nal_type == 5:
+            # IDR slice
+            return I_FRAME
+        if nal_type == 1:
+            # Non-IDR slice: slice_type is the second ue(v) of the slice header
+            header = data[start + 1:start + 9].replace(b"\x00\x00\x03", b"\x00\x00")
+            try:
+                _, bit = _read_ue(header, 0)  # first_mb_in_slice
+                slice_type, _ = _read_ue(header, bit)
+            except IndexError:
+                return UNKNOWN_FRAME
+            return _SLICE_TYPES[slice_type % 5]
+    return UNKNOWN_FRAME
+
+
+def _threaded(items, maxsize=64):
+    """
+    Iterates `items` on a background thread and yields them through a bounded
+    queue, so producing the next items overlaps with consuming the current one.
+    The end of the stream is marked with a None sentinel; exceptions raised by
+    the producer are re-raised in the consumer. Closing the generator stops the
+    producer and closes `items`, so consumers that may stop early must close it.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        # Wait for room, but give up once the consumer has gone away
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+        put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def _packet_frame_info(packets, stream):
+    """
+    Yields (type code, pts, size) for every packet of an H.264 stream,
+    classified from the bitstream alone.
+    """
+    # avcC extradata stores the NAL length prefix size; Annex B streams have none
+    extradata = stream.codec_context.extradata
+    length_size = (extradata[4] & 0x03) + 1 if extradata and extradata[0] == 1 else 0
+
+    for packet in packets:
+        if packet.size == 0:
+            continue
+
+        ptype = _h264_frame_type(bytes(packet), length_size)
+        yield ptype, packet.pts if packet.pts is not None else packet.dts, packet.size
+
+
+def _decoded_frame_info(packets, stream):
+    """
+    Yields (type code, pts, size) for every frame, reading the type from the decoder.
+    """
+    # Let FFmpeg spread decoding over all cores. FRAME threading delays output by
+    # one frame per thread, which does not matter for a batch analysis pass.
+    stream.thread_type = "AUTO"
+    stream.codec_context.thread_count = 0
+
+    # With frame threading, frames come out several packets late, so look the
+    # compressed size up by pts instead of taking the current packet's.
+    sizes_by_pts = {}
+    sequence = 0
+    for packet in packets:
+        if packet.size:
+            if packet.pts is None:
+                # Like the packet-only path: dts, or for raw elementary streams the
+                # packet number, so frames keep their own size and decode order
+                packet.pts = packet.dts if packet.dts is not None else sequence
+            sizes_by_pts[packet.pts] = packet.size
+            sequence += 1
+
+        for frame in packet.decode():
+            try:
+                ptype = _FRAME_TYPE_CODES.get(PictureType(frame.pict_type).name, UNKNOWN_FRAME)
+            except (ValueError, AttributeError):
+                ptype = UNKNOWN_FRAME
+
+            yield ptype, frame.pts, sizes_by_pts.pop(frame.pts, packet.size)
+
+
+def _open_input(file_path, hwaccel=None):
+    """
+    Opens a video for reading. `hwaccel` selects a hardware decoder device type
+    ("cuda", "videotoolbox", "vaapi", ... or "auto" for the first one FFmpeg
+    offers); if that device or this PyAV build cannot be used, it falls back
+    to software decoding.
+    """
+    if hwaccel:
+        try:
+            from av.codec.hwaccel import HWAccel, hwdevices_available
+
+            device_type = hwdevices_available()[0] if hwaccel == "auto" else hwaccel
+            container = av.open(file_path, hwaccel=HWAccel(device_type=device_type, allow_software_fallback=True))
+            print(f"Using hardware decoding ({device_type})")
+            return container
+        except Exception as e:
+            print(f"Hardware decoding unavailable ({e}), falling back to software.")
+    return av.open(file_path)
+
+
+def _frame_table(types, pts, sizes, time_base=DEFAULT_TIME_BASE):
+    """
+    Bundles the per-frame columns (one array each) into a frame table,
+    ordered and indexed by presentation time.
+    """
+    order = np.argsort(pts, kind="stable")
+    return {
+        'index': np.arange(len(order), dtype=np.int32),
+        'type': types[order],
+        'pts': pts[order],
+        'size': sizes[order],
+        'time_base': time_base
+    }
+
+
+# Column dtypes of a frame report (the type column is a small set of repeated strings)
+REPORT_DTYPES = {'index': 'int32', 'type': 'category', 'pts': 'int64', 'size': 'int32', 'size_kb': 'float32'}
+
+
+@functools.lru_cache(maxsize=8)
+def _read_frame_report(report_path, mtime, columns):
+    if report_path.endswith(".parquet"):
+        # Parquet stores the dtypes, so only the column selection is needed
+        return pd.read_parquet(report_path, columns=list(columns))
+    return pd.read_csv(report_path, engine="pyarrow", usecols=list(columns),
+                       dtype={c: REPORT_DTYPES[c] for c in columns})
+
+
+def load_frame_report(report_path, columns=('index', 'type', 'pts', 'size')):
+    """
+    Reads only the given columns of a saved frame report (Parquet, or legacy
+    CSV parsed with explicit dtypes by the PyArrow engine).
+    Results are cached (until the file changes), so running several ghost
+    builders back-to-back parses the report once. Treat the DataFrame as read-only.
+    """
+    return _read_frame_report(report_path, os.path.getmtime(report_path), tuple(columns))
+
+
+def _time_base_path(report_path):
+    """
+    Path of the JSON sidecar that stores a report's stream timebase.
+    """
+    return os.path.splitext(report_path)[0] + ".json"
+
+
+def _load_time_base(report_path):
+    """
+    Reads the stream timebase saved next to a frame report, falling back to
+    the 90000 MPEG-TS timebase for reports written without one.
+    """
+    try:
+        with open(_time_base_path(report_path)) as f:
+            meta = json.load(f)
+        return Fraction(meta['time_base_num'], meta['time_base_den'])
+    except FileNotFoundError:
+        return DEFAULT_TIME_BASE
+
+
+def analyze_video(file_path, decode=False, hwaccel=None, prefetch=64):
+    """
+    Uses PyAV to demux the video container and extract the type (I, P, B) 
     and compressed size of every frame.
+    By default frame types of H.264 streams are read from the packet bitstream,
+    so no frame is ever decoded. Other codecs, or decode=True, take the type
+    from a full (multithreaded) decode instead. Whenever frames are decoded,
+    hwaccel (e.g. "auto", "cuda", "videotoolbox") moves that decode to the GPU.
+
+    When decoding, demuxing, decoding and collecting run as a three-stage
+    threaded pipeline; `prefetch` bounds how many items wait between two stages.
+    The packet-only path runs in this thread (the bitstream parser holds the
+    GIL, so extra threads only slow it down).
+
+    Returns a frame table: a dict of equally long NumPy arrays 'index', 'type'
+    (codes into FRAME_TYPES), 'pts' and 'size', plus the stream 'time_base'.
+    Raw elementary streams (e.g. .h264) have no timestamps, so their frames are
+    numbered and listed in decode order in both modes.
     """
+    types = np.empty(0, dtype=np.uint8)
+    pts_arr = np.empty(0, dtype=np.int64)
+    sizes = np.empty(0, dtype=np.int32)
+    time_base = DEFAULT_TIME_BASE
+    frame_count = 0
+
     try:
-        container = av.open(file_path)
-        results = []
-        frame_count = 0
+        container = _open_input(file_path, hwaccel) if decode else av.open(file_path)
+        stream = container.streams.video[0]
+        time_base = stream.time_base
+
+        # The bitstream parser only knows H.264; other codecs need the decoder for P/B types
+        if not decode and stream.codec_context.name != "h264":
+            print(f"{stream.codec_context.name} stream: decoding frames to read their types.")
+            decode = True
+            if hwaccel:
+                # The hardware decoder is chosen when the input is opened
+                container.close()
+                container = _open_input(file_path, hwaccel)
+                stream = container.streams.video[0]
+
+        # Pre-size from the container's frame count when it has one, grow by doubling otherwise
+        capacity = stream.frames or 1024
+        types = np.empty(capacity, dtype=np.uint8)
+        pts_arr = np.empty(capacity, dtype=np.int64)
+        sizes = np.empty(capacity, dtype=np.int32)
+
+        if decode:
+            # reader thread -> decoder thread -> this thread; one decoder keeps packet order
+            packets = _threaded(container.demux(stream), prefetch)
+            frames = _threaded(_decoded_frame_info(packets, stream), prefetch)
+        else:
+            # The bitstream parser holds the GIL, so extra threads would only add queue hand-offs
+            frames = _packet_frame_info(container.demux(stream), stream)
+
+        try:
+            for ptype, pts, size in frames:
+                if frame_count == capacity:
+                    capacity *= 2
+                    types, pts_arr, sizes = (np.resize(a, capacity) for a in (types, pts_arr, sizes))
+
+                if pts is None:
+                    # Raw elementary streams carry no timestamps; number the packets
+                    pts = pts_arr[frame_count - 1] + 1 if frame_count else 0
+
+                types[frame_count] = ptype
+                pts_arr[frame_count] = pts
+                sizes[frame_count] = size
 
-        for packet in container.demux(video=0):
-            for frame in packet.decode():
-                try:
-                    ptype = PictureType(frame.pict_type).name
-                except (ValueError, AttributeError):
-                    ptype = "Unknown"
-
-                results.append({
-                    'index': frame_count,
-                    'type': ptype,
-                    'pts': frame.pts,
-                    'size': packet.size 
-                })
-                
                 if frame_count % 100 == 0:
                     print(f"Processed {frame_count} frames...")
                 frame_count += 1
-
-        container.close()
-        return results
+        finally:
+            # Stops the pipeline threads before their container goes away
+            frames.close()
+            container.close()
     except Exception as e:
         print(f"An error occurred during analysis: {e}")
-        return []
+        frame_count = 0
+
+    # Packets arrive in decode order; re-index in presentation order like decoded frames
+    return _frame_table(types[:frame_count], pts_arr[:frame_count], sizes[:frame_count], time_base)
 
 
 def plot_frames(frame_data):
@@ -47,91 +350,470 @@ def plot_frames(frame_data):
     Visualizes the GOP (Group of Pictures) structure using Matplotlib.
     High red bars indicate I-frames (keyframes).
     """
-    if not frame_data:
+    if not len(frame_data['index']):
         print("No data to plot.")
         return
 
-    indices = [f['index'] for f in frame_data]
-    sizes = [f['size'] for f in frame_data]
-    types = [f['type'] for f in frame_data]
-    
-    colors_map = {'I': 'red', 'P': 'blue', 'B': 'green', 'Unknown': 'gray'}
-    frame_colors = [colors_map.get(t, 'gray') for t in types]
-
-    plt.figure(figsize=(14, 7))
-    plt.bar(indices, sizes, color=frame_colors, width=1.0)
-    plt.xlabel('Frame Index')
-    plt.ylabel('Compressed Size (Bytes)')
-    plt.title('Video Frame Analysis: GOP Structure')
+    # Plot color of each FRAME_TYPES entry (I, P, B, Unknown)
+    frame_colors = np.array(['red', 'blue', 'green', 'gray'])[frame_data['type']]
+
+    # One LineCollection for all frames instead of one Rectangle per bar
+    fig, ax = plt.subplots(figsize=(14, 7))
+    ax.vlines(frame_data['index'], 0, frame_data['size'], colors=frame_colors)
+    ax.set_ylim(bottom=0)
+    ax.set_xlabel('Frame Index')
+    ax.set_ylabel('Compressed Size (Bytes)')
+    ax.set_title('Video Frame Analysis: GOP Structure')
     
     legend_elements = [Line2D([0], [0], color='red', lw=4, label='I-Frame (Keyframe)'),
                        Line2D([0], [0], color='blue', lw=4, label='P-Frame (Predicted)'),
                        Line2D([0], [0], color='green', lw=4, label='B-Frame (Bi-dir)')]
-    plt.legend(handles=legend_elements)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.legend(handles=legend_elements)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
     plt.show()
 
 
-def save_frame_report(frame_data, destination_folder, filename="video_analysis.csv"):
+def save_frame_report(frame_data, destination_folder, filename="video_analysis.parquet", csv=False):
     """
-    Saves the analyzed frame data into a CSV for later use in splitting/blending.
+    Saves the analyzed frame data into a zstd-compressed Parquet file for later
+    use in splitting/blending; csv=True writes a CSV instead (e.g. for a
+    spreadsheet). The extension of `filename` is set to match the format.
+    The stream timebase is written to a JSON sidecar with the same base name.
     """
-    df = pd.DataFrame(frame_data)
-    df['size_kb'] = (df['size'] / 1024).round(2)
-    full_path = os.path.join(destination_folder, filename)
+    df = pd.DataFrame({
+        'index': frame_data['index'],
+        'type': pd.Categorical.from_codes(frame_data['type'], categories=FRAME_TYPES),
+        'pts': frame_data['pts'],
+        'size': frame_data['size'],
+        'size_kb': frame_data['size'] * (1.0 / 1024)
+    })
+    extension = ".csv" if csv else ".parquet"
+    full_path = os.path.join(destination_folder, os.path.splitext(filename)[0] + extension)
     
     try:
-        df.to_csv(full_path, index=False)
+        if csv:
+            df.to_csv(full_path, index=False, float_format="%.2f")
+        else:
+            df.to_parquet(full_path, compression="zstd", index=False)
+        time_base = frame_data['time_base']
+        with open(_time_base_path(full_path), "w") as f:
+            json.dump({'time_base_num': time_base.numerator, 'time_base_den': time_base.denominator}, f)
         print(f"--- SUCCESS: Report saved to {full_path} ---")
     except Exception as e:
         print(f"Failed to save file: {e}")
 
 
+def _mp4_boxes(data, start=0, end=None):
+    """
+    Yields (type, payload start, payload end) for each ISO-BMFF box in data[start:end].
+    """
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size, header = struct.unpack_from(">Q", data, pos + 8)[0], 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _read_mp4_moov(file_path):
+    """
+    Returns the payload of the top-level 'moov' box, skipping over the media
+    data without reading it, or None if the file has no moov box.
+    """
+    with open(file_path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            size, kind = struct.unpack(">I4s", header)
+            header_size = 8
+            if size == 1:
+                size, header_size = struct.unpack(">Q", f.read(8))[0], 16
+            if kind == b"moov":
+                return f.read() if size == 0 else f.read(size - header_size)
+            if size < header_size:
+                return None
+            f.seek(size - header_size, os.SEEK_CUR)
+
+
+def _mp4_sample_table(file_path):
+    """
+    Reads the first video track's sample table (stsz/stss/stts/ctts/elst) from
+    the MP4 'moov' box. Returns (pts, sizes, keyframe flags, timebase) in decode
+    order, or None when the file is not a plain (non-fragmented) MP4/MOV.
+    """
+    try:
+        moov = _read_mp4_moov(file_path)
+    except OSError:
+        return None
+    if not moov:
+        return None
+
+    def child(kind, start, end):
+        return next(((s, e) for k, s, e in _mp4_boxes(moov, start, end) if k == kind), None)
+
+    # Fragmented MP4 ('mvex' present): 'moov' lists at most the first fragment's
+    # samples, the rest live in 'moof' boxes
+    if child(b"mvex", 0, len(moov)):
+        return None
+
+    def be_array(offset, count, dtype=">u4"):
+        return np.frombuffer(moov, dtype=dtype, count=count, offset=offset).astype(np.int64)
+
+    for kind, trak_start, trak_end in _mp4_boxes(moov):
+        if kind != b"trak":
+            continue
+        mdia = child(b"mdia", trak_start, trak_end)
+        hdlr = mdia and child(b"hdlr", *mdia)
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+
+        mdhd = child(b"mdhd", *mdia)
+        version = moov[mdhd[0]]
+        timescale = struct.unpack_from(">I", moov, mdhd[0] + (20 if version == 1 else 12))[0]
+
+        minf = child(b"minf", *mdia)
+        stbl = minf and child(b"stbl", *minf)
+        stsz = stbl and child(b"stsz", *stbl)
+        stts = stbl and child(b"stts", *stbl)
+        if not stsz or not stts:
+            return None
+
+        # Sample sizes: either one size for all samples or one entry each
+        sample_size, count = struct.unpack_from(">II", moov, stsz[0] + 4)
+        if count == 0:
+            return None
+        sizes = np.full(count, sample_size, dtype=np.int64) if sample_size else be_array(stsz[0] + 12, count)
+
+        # Decode timestamps from run-length (count, delta) pairs
+        entries = struct.unpack_from(">I", moov, stts[0] + 4)[0]
+        runs = be_array(stts[0] + 8, entries * 2).reshape(-1, 2)
+        deltas = np.repeat(runs[:, 1], runs[:, 0])[:count]
+        dts = np.concatenate(([0], np.cumsum(deltas)[:-1]))
+
+        # Composition offsets (B-frame reordering), also run-length coded
+        pts = dts
+        ctts = child(b"ctts", *stbl)
+        if ctts:
+            entries = struct.unpack_from(">I", moov, ctts[0] + 4)[0]
+            runs = be_array(ctts[0] + 8, entries * 2, dtype=">i4").reshape(-1, 2)
+            pts = dts + np.repeat(runs[:, 1], runs[:, 0])[:count]
+
+        # Like FFmpeg, shift timestamps by the media time of the first non-empty edit,
+        # delayed by any leading empty edits (given in the movie timescale from 'mvhd')
+        edts = child(b"edts", trak_start, trak_end)
+        elst = edts and child(b"elst", *edts)
+        if elst:
+            elst_version = moov[elst[0]]
+            entries = struct.unpack_from(">I", moov, elst[0] + 4)[0]
+            entry_size, fmt = (20, ">Qq") if elst_version == 1 else (12, ">Ii")
+            empty_duration = 0
+            for i in range(entries):
+                duration, media_time = struct.unpack_from(fmt, moov, elst[0] + 8 + i * entry_size)
+                if media_time == -1:
+                    empty_duration += duration
+                    continue
+                if empty_duration:
+                    mvhd = child(b"mvhd", 0, len(moov))
+                    if not mvhd:
+                        return None
+                    mvhd_version = moov[mvhd[0]]
+                    movie_timescale = struct.unpack_from(
+                        ">I", moov, mvhd[0] + (20 if mvhd_version == 1 else 12))[0]
+                    if not movie_timescale:
+                        return None
+                    pts = pts + empty_duration * timescale // movie_timescale
+                pts = pts - media_time
+                break
+
+        # Sync samples (1-based); without an stss box every sample is a keyframe
+        stss = child(b"stss", *stbl)
+        if stss:
+            keyframes = np.zeros(count, dtype=bool)
+            entries = struct.unpack_from(">I", moov, stss[0] + 4)[0]
+            keyframes[be_array(stss[0] + 8, entries) - 1] = True
+        else:
+            keyframes = np.ones(count, dtype=bool)
+
+        return pts, sizes, keyframes, Fraction(1, timescale)
+    return None
+
+
+def _read_iframe_table(file_path):
+    """
+    Returns (index, pts, size, keyframe flag, timebase) for every frame in
+    presentation order, from the MP4 sample table when possible and from a
+    demux-only pass (no decode) otherwise.
+    """
+    table = None
+    try:
+        table = _mp4_sample_table(file_path)
+    except (struct.error, ValueError, IndexError, TypeError):
+        # Malformed or unusual box layout; let FFmpeg's demuxer handle it
+        pass
+
+    if table is None:
+        with av.open(file_path) as container:
+            stream = container.streams.video[0]
+            pts, sizes, keyframes = [], [], []
+            for packet in container.demux(stream):
+                if packet.size and packet.pts is not None:
+                    pts.append(packet.pts)
+                    sizes.append(packet.size)
+                    keyframes.append(packet.is_keyframe)
+            table = (np.array(pts, dtype=np.int64), np.array(sizes, dtype=np.int64),
+                     np.array(keyframes, dtype=bool), stream.time_base)
+
+    pts, sizes, keyframes, time_base = table
+    order = np.argsort(pts, kind="stable")
+    return np.arange(len(order), dtype=np.int32), pts[order], sizes[order], keyframes[order], time_base
+
+
+def extract_iframe_table(file_path):
+    """
+    Lists (index, pts, size, keyframe flag) arrays for every frame without
+    decoding or even reading the media data of MP4/MOV files: their 'moov'
+    sample table already holds sizes, timestamps and keyframes. Other
+    containers fall back to a demux-only pass.
+    """
+    return _read_iframe_table(file_path)[:4]
+
+
+def _split_points(pts, keyframes):
+    """
+    Pts of the keyframes that start a new segment: all but the one at the first
+    frame, which is not at pts 0 with B-frame delay or an edit-list offset.
+    """
+    start = max(pts.min(), 0) if len(pts) else 0
+    return pts[keyframes & (pts > start)]
+
+
+def extract_iframe_pts(file_path):
+    """
+    Fast path for splitting: lists the pts of the keyframes (after the first frame) using
+    only the container's keyframe flags (see extract_iframe_table), so nothing
+    is decoded and no report is needed.
+    Use analyze_video for the full I/P/B report and plots.
+    """
+    _, pts, _, keyframes = extract_iframe_table(file_path)
+    return _split_points(pts, keyframes).tolist()
+
+
+def _run_ffmpeg(cmd):
+    """
+    Runs an ffmpeg command with only errors logged and no progress stats, so
+    nothing large is buffered even for long encodes. stdout is discarded and
+    stderr is printed only if FFmpeg fails. Returns True on success.
+    """
+    cmd = cmd[:1] + ["-hide_banner", "-loglevel", "error", "-nostats"] + cmd[1:]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        print("FFmpeg Error:\n", result.stderr.decode(errors="replace"))
+    return result.returncode == 0
+
+
 def split_video_pro(video_path, csv_path, output_dir):
     """
     Uses the FFmpeg 'segment' muxer to chop the video at every I-frame.
     'reset_timestamps 1' ensures every segment starts at 0.0s for the blending step.
+    Pass csv_path=None to take the I-frames straight from the video (see extract_iframe_pts)
+    instead of from a saved report.
     """
-    df = pd.read_csv(csv_path)
-    iframes = df[df['type'] == 'I']
+    if csv_path is None:
+        _, pts, _, keyframes, time_base = _read_iframe_table(video_path)
+    else:
+        df = load_frame_report(csv_path, ('pts', 'type'))
+        pts, keyframes = df['pts'].to_numpy(), (df['type'] == 'I').to_numpy()
+        time_base = _load_time_base(csv_path)
     
-    # Calculate split points based on the 90000 timebase
-    split_points = [f"{pts/90000:.4f}" for pts in iframes['pts'] if pts > 0]
-    times_string = ",".join(split_points)
+    # With B-frames the segment muxer sees each keyframe slightly before its pts;
+    # half a frame of slack makes it cut at that keyframe instead of the next one
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        rate = stream.average_rate or stream.guessed_rate
+        start_time = (container.start_time or 0) / av.time_base
+    time_delta = 0.5 / float(rate) if rate else 0.0
+
+    # Calculate split points in seconds using the stream timebase; FFmpeg moves
+    # the input's start time to 0, so the split times are relative to it
+    iframe_pts = _split_points(pts, keyframes)
+    times_string = ",".join(np.char.mod("%.4f", iframe_pts * float(time_base) - start_time))
     
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         
     output_pattern = os.path.join(output_dir, "segment_%03d.mp4")
 
-    cmd = [
-        "ffmpeg", "-y", "-i", video_path,
-        "-f", "segment", "-segment_times", times_string,
-        "-reset_timestamps", "1", "-map", "0", "-c", "copy",
-        output_pattern
-    ]
-
     print("Running split at I-frames...")
-    subprocess.run(cmd)
-    print(f"Split complete. Files saved in: {output_dir}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        segment_list = os.path.join(tmp_dir, "segments.txt")
+        cmd = [
+            "ffmpeg", "-y", "-i", video_path,
+            "-f", "segment", "-segment_times", times_string,
+            "-segment_time_delta", f"{time_delta:.6f}", "-segment_list", segment_list,
+            "-reset_timestamps", "1", "-map", "0", "-c", "copy",
+            output_pattern
+        ]
+        if not _run_ffmpeg(cmd):
+            return
+        with open(segment_list) as f:
+            segment_count = len(f.read().split())
 
+    expected = len(iframe_pts) + 1
+    if segment_count != expected:
+        print(f"Warning: wrote {segment_count} segments but the video has {expected} I-frames.")
+    print(f"Split complete. {segment_count} segments saved in: {output_dir}")
 
-def create_grayscale_ghost_video(segments_dir, csv_path, output_file, num_segments=12, mode="lighten"):
+
+def _padding_needed(csv_path, segment_frames=90):
     """
-    Creates a clean grayscale ghost video as a base for RGB overlay.
-    Converts to grayscale first, then blends for a neutral white/gray base.
+    Number of frames the short final segment must be padded with so that it
+    lasts as long as the others.
     """
-    df = pd.read_csv(csv_path)
+    df = load_frame_report(csv_path, ('index', 'type'))
     total_frames = len(df)
     last_iframe_idx = df[df['type'] == 'I']['index'].max()
-    
+
     frames_in_last = total_frames - last_iframe_idx
-    padding_needed = 90 - frames_in_last 
-    
+    return segment_frames - frames_in_last
+
+
+def _segment_input_args(segments_dir, num_segments):
+    """
+    FFmpeg '-i' arguments for segment_000.mp4 ... segment_{num_segments-1}.mp4.
+    """
     input_args = []
     for i in range(num_segments):
         file_path = os.path.join(segments_dir, f"segment_{i:03d}.mp4")
         input_args.extend(["-i", file_path])
+    return input_args
+
+
+# colorchannelmixer filters keeping only the RED, GREEN and BLUE channel, indexed by zone id
+COLOR_FILTERS = (
+    "colorchannelmixer=rr=1.0:rg=0:rb=0:gr=0:gg=0:gb=0:br=0:bg=0:bb=0",
+    "colorchannelmixer=rr=0:rg=0:rb=0:gr=0:gg=1.0:gb=0:br=0:bg=0:bb=0",
+    "colorchannelmixer=rr=0:rg=0:rb=0:gr=0:gg=0:gb=0:br=0:bg=0:bb=1.0",
+)
+ZONE_NAMES = ("RED", "GREEN", "BLUE")
+
+
+def _zone_ids(num_segments):
+    """
+    Temporal zone (0 = early/red, 1 = middle/green, 2 = late/blue) of every segment.
+    """
+    return [min(i * 3 // num_segments, 2) for i in range(num_segments)]
+
+
+# min/max blends give the same result in any grouping, so they can be reduced as a tree
+ASSOCIATIVE_BLEND_MODES = {"darken", "lighten"}
+
+
+def _blend_all(labels, mode, prefix, out_label):
+    """
+    Filter parts blending all streams in `labels` with blend=all_mode=mode;
+    intermediate results are named [{prefix}{i}].
+    Associative modes are reduced pairwise as a balanced tree (depth log2(n)
+    instead of n-1, and independent nodes can run in parallel); other modes
+    are blended one after the other.
+    """
+    filter_parts = []
+    count = 0
+
+    def blend(a, b, is_last):
+        nonlocal count
+        count += 1
+        label = out_label if is_last else f"[{prefix}{count}]"
+        filter_parts.append(f"{a}{b}blend=all_mode={mode}{label}")
+        return label
+
+    if mode in ASSOCIATIVE_BLEND_MODES:
+        level = list(labels)
+        while len(level) > 1:
+            pairs = [level[i:i + 2] for i in range(0, len(level), 2)]
+            level = [blend(p[0], p[1], len(level) == 2) if len(p) == 2 else p[0] for p in pairs]
+    else:
+        last_label = labels[0]
+        for i in range(1, len(labels)):
+            last_label = blend(last_label, labels[i], i == len(labels) - 1)
+    return filter_parts
+
+
+def _x264_args(preset, tune=None):
+    """
+    libx264 encoder arguments (CRF 18, yuv420p, all cores) for an x264 preset/tune.
+    Fast presets suit quick iterations; slower ones the final render.
+    """
+    args = ["-c:v", "libx264", "-crf", "18", "-preset", preset]
+    if tune:
+        args += ["-tune", tune]
+    return args + [
+        "-threads", "0", "-x264-params", "sliced-threads=1:lookahead-threads=2",
+        "-pix_fmt", "yuv420p"
+    ]
+
+
+# Encoder settings used when GHOSTIFY_ENC selects a hardware encoder for the final render
+HW_ENCODER_ARGS = {
+    "h264_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "18"],
+    "hevc_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "18"],
+    "h264_videotoolbox": ["-q:v", "65"],
+    "hevc_videotoolbox": ["-q:v", "65"],
+}
+
+
+def _final_encoder_args(preset, tune=None):
+    """
+    Encoder arguments for final renders: libx264 (see _x264_args) unless the
+    GHOSTIFY_ENC environment variable names another encoder, e.g.
+    h264_videotoolbox on macOS or h264_nvenc on Linux with CUDA, which moves
+    the encode off the CPU. preset/tune only apply to libx264.
+    """
+    encoder = os.environ.get("GHOSTIFY_ENC", "libx264")
+    if encoder == "libx264":
+        return _x264_args(preset, tune)
+    return ["-c:v", encoder] + HW_ENCODER_ARGS.get(encoder, []) + ["-pix_fmt", "yuv420p"]
+
+
+def _ffv1_args():
+    """
+    Lossless FFV1 encoder arguments for intermediate videos (write them as .mkv).
+    FFV1 encodes at close to I/O speed and adds no generation loss before the final encode.
+    """
+    return ["-c:v", "ffv1", "-level", "3", "-threads", "0", "-pix_fmt", "yuv420p"]
+
+
+# Containers that can hold FFV1 (MP4 cannot)
+LOSSLESS_EXTENSIONS = (".mkv", ".nut")
+
+
+def _check_lossless_output(output_file):
+    """
+    Raises ValueError unless output_file is a container FFV1 can be written to.
+    """
+    if not output_file.lower().endswith(LOSSLESS_EXTENSIONS):
+        raise ValueError(
+            f"Lossless (FFV1) ghost videos must be written as .mkv or .nut, got {output_file!r}"
+        )
+
+
+def create_grayscale_ghost_video(segments_dir, csv_path, output_file, num_segments=12, mode="lighten"):
+    """
+    Creates a clean grayscale ghost video as a base for RGB overlay.
+    Converts to grayscale first, then blends for a neutral white/gray base.
+    The base is an intermediate, so it is written losslessly as FFV1; output_file
+    must be .mkv or .nut (ValueError otherwise).
+    """
+    _check_lossless_output(output_file)
+    padding_needed = _padding_needed(csv_path)
+    input_args = _segment_input_args(segments_dir, num_segments)
 
     # Build filter: convert each segment to grayscale, then blend
     filter_parts = []
@@ -144,11 +826,7 @@ def create_grayscale_ghost_video(segments_dir, csv_path, output_file, num_segmen
     filter_parts.append(f"[{num_segments-1}:v]tpad=stop={padding_needed}:stop_mode=clone,hue=s=0[v{num_segments-1}_gray]")
     
     # Blend all grayscale segments
-    last_label = "[v0_gray]"
-    for i in range(1, num_segments):
-        next_label = f"[b{i}]" if i < num_segments - 1 else "[outv]"
-        filter_parts.append(f"{last_label}[v{i}_gray]blend=all_mode={mode}{next_label}")
-        last_label = next_label
+    filter_parts += _blend_all([f"[v{i}_gray]" for i in range(num_segments)], mode, "b", "[outv]")
     
     filter_complex = "; ".join(filter_parts)
 
@@ -156,16 +834,14 @@ def create_grayscale_ghost_video(segments_dir, csv_path, output_file, num_segmen
         "ffmpeg", "-y"
     ] + input_args + [
         "-filter_complex", filter_complex,
-        "-map", "[outv]", "-c:v", "libx264", "-crf", "18", "-pix_fmt", "yuv420p",
+        "-map", "[outv]"
+    ] + _ffv1_args() + [
         output_file
     ]
 
     print(f"Generating Grayscale Ghost Base (Mode: {mode})...")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode == 0:
+    if _run_ffmpeg(cmd):
         print(f"Success! Grayscale ghost video: {output_file}")
-    else:
-        print("FFmpeg Error:\n", result.stderr)
 
 
 def create_temporal_ghost_video(segments_dir, csv_path, output_file, num_segments=12):
@@ -177,63 +853,29 @@ def create_temporal_ghost_video(segments_dir, csv_path, output_file, num_segment
     
     Static background: R+G+B = natural color
     Moving objects: retain their zone color = temporal identification
+
+    The video is an intermediate, so it is written losslessly as FFV1; output_file
+    must be .mkv or .nut (ValueError otherwise).
     """
-    df = pd.read_csv(csv_path)
-    total_frames = len(df)
-    last_iframe_idx = df[df['type'] == 'I']['index'].max()
-    
+    _check_lossless_output(output_file)
     # Handle the short final segment by padding
-    frames_in_last = total_frames - last_iframe_idx
-    padding_needed = 90 - frames_in_last
-    
-    # Build input arguments
-    input_args = []
-    for i in range(num_segments):
-        file_path = os.path.join(segments_dir, f"segment_{i:03d}.mp4")
-        input_args.extend(["-i", file_path])
+    padding_needed = _padding_needed(csv_path)
+    input_args = _segment_input_args(segments_dir, num_segments)
     
     # Build the complex filter with RGB temporal zones
-    filter_parts = []
-    
-    # Pad the last segment first
-    filter_parts.append(f"[{num_segments-1}:v]tpad=stop={padding_needed}:stop_mode=clone[v{num_segments-1}_padded]")
-    
-    # Determine which third each segment belongs to
-    third_size = num_segments / 3
+    zones = _zone_ids(num_segments)
+    last = num_segments - 1
     
-    # Apply color zone to each segment
-    for i in range(num_segments):
-        input_label = f"[v{i}_padded]" if i == num_segments-1 else f"[{i}:v]"
-        output_label = f"[v{i}_processed]"
-        
-        # Determine color zone based on segment index
-        if i < third_size:
-            # Early: RED zone (keep red, reduce green and blue)
-            color_filter = "colorchannelmixer=rr=1.0:rg=0:rb=0:gr=0:gg=0:gb=0:br=0:bg=0:bb=0"
-            zone = "RED"
-        elif i < 2 * third_size:
-            # Middle: GREEN zone (keep green, reduce red and blue)
-            color_filter = "colorchannelmixer=rr=0:rg=0:rb=0:gr=0:gg=1.0:gb=0:br=0:bg=0:bb=0"
-            zone = "GREEN"
-        else:
-            # Late: BLUE zone (keep blue, reduce red and green)
-            color_filter = "colorchannelmixer=rr=0:rg=0:rb=0:gr=0:gg=0:gb=0:br=0:bg=0:bb=1.0"
-            zone = "BLUE"
-        
-        # Apply color zone
-        filter_parts.append(f"{input_label}{color_filter}{output_label}")
-        print(f"  Segment {i:02d}: {zone} zone")
+    # Pad the last segment first, then apply each segment's color zone
+    filter_parts = [f"[{last}:v]tpad=stop={padding_needed}:stop_mode=clone[v{last}_padded]"]
+    input_labels = [f"[{i}:v]" for i in range(last)] + [f"[v{last}_padded]"]
+    filter_parts += [
+        f"{label}{COLOR_FILTERS[zone]}[v{i}_processed]"
+        for i, (label, zone) in enumerate(zip(input_labels, zones))
+    ]
     
     # Now blend all processed segments using lighten mode (better for RGB additive)
-    # Start with first segment
-    last_label = "[v0_processed]"
-    
-    for i in range(1, num_segments):
-        next_label = f"[blend{i}]" if i < num_segments - 1 else "[outv]"
-        filter_parts.append(
-            f"{last_label}[v{i}_processed]blend=all_mode=lighten{next_label}"
-        )
-        last_label = next_label
+    filter_parts += _blend_all([f"[v{i}_processed]" for i in range(num_segments)], "lighten", "blend", "[outv]")
     
     filter_complex = "; ".join(filter_parts)
     
@@ -241,23 +883,22 @@ def create_temporal_ghost_video(segments_dir, csv_path, output_file, num_segment
         "ffmpeg", "-y"
     ] + input_args + [
         "-filter_complex", filter_complex,
-        "-map", "[outv]", "-c:v", "libx264", "-crf", "18", "-pix_fmt", "yuv420p",
+        "-map", "[outv]"
+    ] + _ffv1_args() + [
         output_file
     ]
     
-    print(f"Generating RGB Temporal Ghost Video...")
-    print(f"  - Early (segments 0-3): RED")
-    print(f"  - Middle (segments 4-7): GREEN")
-    print(f"  - Late (segments 8-11): BLUE")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode == 0:
+    print("Generating RGB Temporal Ghost Video...")
+    for zone, when in enumerate(("Early", "Middle", "Late")):
+        segments = [i for i, z in enumerate(zones) if z == zone]
+        if segments:
+            print(f"  - {when} (segments {segments[0]}-{segments[-1]}): {ZONE_NAMES[zone]}")
+    if _run_ffmpeg(cmd):
         print(f"Success! RGB temporal ghost video: {output_file}")
-    else:
-        print("FFmpeg Error:\n", result.stderr)
 
 
-def combine_ghost_videos(solid_video_path, rgb_video_path, output_file, mode="overlay", opacity=0.6):
+def combine_ghost_videos(solid_video_path, rgb_video_path, output_file, mode="overlay", opacity=0.6,
+                         preset="slow", tune="film"):
     """
     Overlays the RGB Ghost video onto the Solid Ghost video.
     
@@ -268,6 +909,9 @@ def combine_ghost_videos(solid_video_path, rgb_video_path, output_file, mode="ov
     - 'addition': Simple additive blending
     
     Opacity: Controls how strong the RGB colors appear (0.0 = invisible, 1.0 = full strength)
+
+    preset/tune are handed to libx264 (quality-oriented by default for the final render);
+    set GHOSTIFY_ENC to use a hardware encoder instead (see _final_encoder_args).
     """
     
     # Adjust the RGB opacity before blending for better control
@@ -278,29 +922,194 @@ def combine_ghost_videos(solid_video_path, rgb_video_path, output_file, mode="ov
         "-filter_complex", 
         f"[1:v]format=yuva420p,colorchannelmixer=aa={opacity}[rgb_adjusted];"
         f"[0:v][rgb_adjusted]blend=all_mode={mode}[outv]",
-        "-map", "[outv]", 
-        "-c:v", "libx264", "-crf", "18", "-pix_fmt", "yuv420p",
+        "-map", "[outv]"
+    ] + _final_encoder_args(preset, tune) + [
         output_file
     ]
 
     print(f"Generating Composite Hybrid (Mode: {mode}, Opacity: {opacity})...")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode == 0:
+    if _run_ffmpeg(cmd):
+        print(f"Success! Hybrid ghost video saved to: {output_file}")
+
+
+def create_hybrid_ghost_video(segments_dir, csv_path, output_file, num_segments=12,
+                              base_mode="lighten", mode="overlay", opacity=0.6,
+                              preset="slow", tune="film"):
+    """
+    Builds the final hybrid in a single FFmpeg run: the grayscale base
+    (as create_grayscale_ghost_video), the RGB temporal layer (as
+    create_temporal_ghost_video) and their overlay (as combine_ghost_videos)
+    share one filter graph, so no intermediate video is encoded and decoded.
+
+    base_mode: blend mode of the grayscale base ("lighten" or "darken")
+    mode, opacity: how the RGB layer is laid over the base
+    preset, tune: libx264 settings for the final render (GHOSTIFY_ENC picks another encoder)
+    """
+    padding_needed = _padding_needed(csv_path)
+    input_args = _segment_input_args(segments_dir, num_segments)
+
+    filter_parts = []
+    for i, zone in enumerate(_zone_ids(num_segments)):
+        # Pad the last segment, then fork every segment into a gray and a color branch
+        pad = f"tpad=stop={padding_needed}:stop_mode=clone," if i == num_segments - 1 else ""
+        filter_parts.append(f"[{i}:v]{pad}split[g{i}][c{i}]")
+        filter_parts.append(f"[g{i}]hue=s=0[v{i}_gray]")
+        filter_parts.append(f"[c{i}]{COLOR_FILTERS[zone]}[v{i}_processed]")
+
+    filter_parts += _blend_all([f"[v{i}_gray]" for i in range(num_segments)], base_mode, "b", "[solid]")
+    filter_parts += _blend_all([f"[v{i}_processed]" for i in range(num_segments)], "lighten", "blend", "[rgb]")
+    filter_parts.append(f"[rgb]format=yuva420p,colorchannelmixer=aa={opacity}[rgb_adjusted]")
+    filter_parts.append(f"[solid][rgb_adjusted]blend=all_mode={mode}[outv]")
+
+    filter_complex = "; ".join(filter_parts)
+
+    cmd = [
+        "ffmpeg", "-y"
+    ] + input_args + [
+        "-filter_complex", filter_complex,
+        "-map", "[outv]"
+    ] + _final_encoder_args(preset, tune) + [
+        output_file
+    ]
+
+    print(f"Generating Hybrid Ghost in one pass (Base: {base_mode}, Mode: {mode}, Opacity: {opacity})...")
+    if _run_ffmpeg(cmd):
         print(f"Success! Hybrid ghost video saved to: {output_file}")
+
+
+def _segment_frames(file_path):
+    """
+    Decodes a segment with multithreaded PyAV and yields its frames as
+    yuv420p arrays of shape (height * 3 // 2, width).
+    """
+    with av.open(file_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        for frame in container.decode(stream):
+            yield frame.to_ndarray(format="yuv420p")
+
+
+if numba is not None:
+    @numba.njit(parallel=True, boundscheck=False, cache=True)
+    def _reduce_frames_numba(stack, darken):
+        n, rows, cols = stack.shape
+        out = np.empty((rows, cols), dtype=stack.dtype)
+        for y in numba.prange(rows):
+            for x in range(cols):
+                value = stack[0, y, x]
+                for k in range(1, n):
+                    sample = stack[k, y, x]
+                    if darken:
+                        if sample < value:
+                            value = sample
+                    elif sample > value:
+                        value = sample
+                out[y, x] = value
+        return out
+
+
+def _reduce_frames(stack, mode):
+    """
+    Elementwise darken (min) or lighten (max) over the first axis of a frame stack.
+    """
+    if numba is not None:
+        return _reduce_frames_numba(stack, mode == "darken")
+    reduce = np.minimum.reduce if mode == "darken" else np.maximum.reduce
+    return reduce(stack, axis=0)
+
+
+def create_numpy_ghost_video(segments_dir, output_file, num_segments=12, mode="darken", grayscale=False,
+                             lossless=False, preset="slow", tune="film"):
+    """
+    Creates a solid (or, with grayscale=True, grayscale) ghost video without an
+    FFmpeg filter graph: all segments are decoded in parallel threads, every
+    output frame is the elementwise min ('darken') or max ('lighten') of the
+    aligned segment frames, and the result is encoded through PyAV.
+    Uses a Numba kernel when numba is installed, NumPy reductions otherwise.
+
+    Segments that end early keep contributing their last frame, which is what
+    padding the short final segment does in the FFmpeg builders. All segments
+    must have the same frame size and at least one frame (ValueError otherwise).
+    lossless=True writes FFV1 (.mkv or .nut only) for use as an intermediate; otherwise
+    the output is libx264 CRF 18 with the given preset/tune.
+    """
+    if mode not in ASSOCIATIVE_BLEND_MODES:
+        raise ValueError(f"mode must be one of {sorted(ASSOCIATIVE_BLEND_MODES)}, got {mode!r}")
+    if lossless:
+        _check_lossless_output(output_file)
+
+    paths = [os.path.join(segments_dir, f"segment_{i:03d}.mp4") for i in range(num_segments)]
+    # Every segment fills one slot of the frame stack, so all must match the first
+    for path in paths:
+        with av.open(path) as probe:
+            if not probe.streams.video:
+                raise ValueError(f"{path} has no video stream")
+            in_stream = probe.streams.video[0]
+            if path == paths[0]:
+                rate, width, height = in_stream.average_rate, in_stream.width, in_stream.height
+            elif (in_stream.width, in_stream.height) != (width, height):
+                raise ValueError(f"{path} is {in_stream.width}x{in_stream.height}, "
+                                 f"but the first segment is {width}x{height}")
+
+    readers = [_threaded(_segment_frames(path), maxsize=8) for path in paths]
+    stack = np.empty((num_segments, height * 3 // 2, width), dtype=np.uint8)
+
+    output = av.open(output_file, "w")
+    if lossless:
+        out_stream = output.add_stream("ffv1", rate=rate, options={"level": "3"})
     else:
-        print("FFmpeg Error:\n", result.stderr)
+        options = {"crf": "18", "preset": preset}
+        if tune:
+            options["tune"] = tune
+        out_stream = output.add_stream("libx264", rate=rate, options=options)
+    out_stream.width, out_stream.height, out_stream.pix_fmt = width, height, "yuv420p"
+
+    print(f"Generating NumPy Ghost (Mode: {mode}, Grayscale: {grayscale}, Numba: {numba is not None})...")
+    # A grayscale ghost has neutral chroma, so only the luma plane needs reducing
+    planes = slice(0, height) if grayscale else slice(None)
+    frame_count = 0
+    try:
+        while True:
+            alive = False
+            for k, reader in enumerate(readers):
+                frame = next(reader, None)
+                if frame is not None:
+                    stack[k] = frame
+                    alive = True
+                elif frame_count == 0:
+                    # Its slot in the stack would never be filled
+                    raise ValueError(f"{paths[k]} has no decodable frames")
+            if not alive:
+                break
+
+            ghost = np.full(stack.shape[1:], 128, dtype=np.uint8)
+            ghost[planes] = _reduce_frames(stack[:, planes], mode)
+
+            out_frame = av.VideoFrame.from_ndarray(ghost, format="yuv420p")
+            out_frame.pts = frame_count
+            for packet in out_stream.encode(out_frame):
+                output.mux(packet)
+            frame_count += 1
+
+        for packet in out_stream.encode():
+            output.mux(packet)
+    finally:
+        # Stops the decoding threads (and closes their inputs) even if encoding failed
+        for reader in readers:
+            reader.close()
+        output.close()
+    print(f"Success! NumPy ghost video ({frame_count} frames): {output_file}")
 
 
 # ============================================================================
 # SETUP - Change these paths to match your files
 # ============================================================================
 video_in = "/Users/neudestifanoes/desktop/claude/thevideo.mp4"
-csv_log = "video_analysis.csv"
+report_log = "video_analysis.parquet"
 output_folder = "/Users/neudestifanoes/desktop/claude"
 seg_folder = "/Users/neudestifanoes/desktop/claude/segments_fixed"
-ghost_out = "/Users/neudestifanoes/desktop/claude/rgb_ghost.mp4"
-ghost_out2 = "/Users/neudestifanoes/desktop/claude/grayscale.mp4"
+ghost_out = "/Users/neudestifanoes/desktop/claude/rgb_ghost.mkv"
+ghost_out2 = "/Users/neudestifanoes/desktop/claude/grayscale.mkv"
 hybrid_out = "/Users/neudestifanoes/desktop/claude/final_hybrid.mp4"
 
 
@@ -311,11 +1120,20 @@ hybrid_out = "/Users/neudestifanoes/desktop/claude/final_hybrid.mp4"
 # For running for first time? Run these lines once then comment them out:
 #final_data = analyze_video(video_in)
 #save_frame_report(final_data, output_folder)
-#split_video_pro(video_in, csv_log, seg_folder)
+#split_video_pro(video_in, report_log, seg_folder)
+
+# Only need the segments? Split straight from the keyframes, no analysis or report:
+#split_video_pro(video_in, None, seg_folder)
 
 # Then create your ghost video:
-#create_grayscale_ghost_video(seg_folder, csv_log, ghost_out2, num_segments=12, mode="lighten")
-#create_temporal_ghost_video(seg_folder, csv_log, ghost_out, num_segments=12)
+#create_grayscale_ghost_video(seg_folder, report_log, ghost_out2, num_segments=12, mode="lighten")
+#create_temporal_ghost_video(seg_folder, report_log, ghost_out, num_segments=12)
 #combine_ghost_videos(ghost_out2, ghost_out, hybrid_out, mode="overlay", opacity=0.6)
 
+# Or build the final hybrid directly in a single FFmpeg pass (no intermediate videos):
+#create_hybrid_ghost_video(seg_folder, report_log, hybrid_out, num_segments=12, base_mode="lighten", mode="overlay", opacity=0.6)
+
+# Or build the grayscale base in NumPy/Numba instead of an FFmpeg blend graph:
+#create_numpy_ghost_video(seg_folder, ghost_out2, num_segments=12, mode="lighten", grayscale=True, lossless=True)
+
 # For slightly different color and version, Try mode="hardlight" at opacity=0.7 instead, 
\ No newline at end of file